@@ -4,7 +4,7 @@
 ║                          MEDIA CAPTIONER                                       ║
 ║                                                                                ║
 ║  Auto-generate subtitles for videos and transcriptions for audio using:        ║
-║  • Whisper (OpenAI) for speech-to-text transcription                           ║
+║  • Whisper (faster-whisper) for speech-to-text transcription                   ║
 ║  • LanguageTool for grammar correction (optional)                              ║
 ║                                                                                ║
 ║  USAGE:                                                                        ║
@@ -12,6 +12,7 @@
 ║    python3 caption_video.py audio.mp3                                          ║
 ║    python3 caption_video.py video.mp4 --soft                                   ║
 ║    python3 caption_video.py video.mp4 --no-grammar                             ║
+║    python3 caption_video.py a.mp4 b.mp3 c.mkv                                  ║
 ║    python3 caption_video.py --check                                            ║
 ║                                                                                ║
 ║  SUPPORTED FORMATS:                                                            ║
@@ -23,8 +24,17 @@
 """
 
 import argparse
+import functools
+import importlib.util
+import io
+import itertools
+import os
+import re
+import shutil
 import subprocess
 import sys
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 
 # ═══════════════════════════════════════════════════════════════════════════════
@@ -32,6 +42,29 @@ from pathlib import Path
 # ═══════════════════════════════════════════════════════════════════════════════
 
 WHISPER_MODEL = "medium"  # Options: tiny, base, small, medium, large
+WHISPER_BATCH_SIZE = 16   # Speech chunks decoded in parallel (lower if out of GPU memory)
+SRT_WRITE_BATCH = 64      # Segments per SRT write while transcription is streaming
+SPLIT_MIN_SILENCE_MS = 500  # Shortest pause where the audio may be split across GPUs
+
+# Pre-quantized INT8 copies of the Whisper model (created once by the dependency check)
+MODELS_DIR = Path(__file__).parent / "models"
+CT2_CONVERTER = "ct2-transformers-converter"
+
+# WHISPER_MODEL name → Hugging Face checkpoint (same models faster-whisper picks for these names)
+HF_MODEL_IDS = {
+    "tiny": "openai/whisper-tiny", "base": "openai/whisper-base",
+    "small": "openai/whisper-small", "medium": "openai/whisper-medium",
+    "large": "openai/whisper-large-v3",
+}
+
+# ffmpeg progress/log output: discarded unless CAPTION_VERBOSE is set (then shown on the terminal)
+FFMPEG_LOG = None if os.environ.get("CAPTION_VERBOSE") else subprocess.DEVNULL
+
+# Inputs at least this large are read through ffmpeg's "async" read-ahead protocol
+ASYNC_READ_MIN_BYTES = 1 << 30  # 1 GB
+
+# Escapes for a path inside ffmpeg's subtitles='...' filter argument
+SUBTITLES_ESCAPE = str.maketrans({":": "\\:", "'": "\\'"})
 
 # Supported file extensions
 VIDEO_EXTENSIONS = {".mp4", ".mkv", ".mov", ".avi", ".webm", ".flv", ".wmv", ".m4v"}
@@ -43,6 +76,25 @@ LANG_MAP = {
     "pt": "pt-PT", "nl": "nl", "pl": "pl-PL", "ru": "ru-RU",
 }
 
+# Marks segment boundaries when all segments are corrected in a single request
+GRAMMAR_SEPARATOR = "\n§§§\n"
+GRAMMAR_WORKERS = 8  # Parallel LanguageTool requests when correcting segment by segment
+
+# English spell check with SymSpell: lowercase words only (capitalized ones are likely names)
+SPELL_WORD_RE = re.compile(r"(?<![\w'])[a-z]+(?![\w'])")
+SPELL_MIN_COUNT = 1_000_000  # Suggestion must be at least this frequent in the dictionary
+SPELL_MIN_RATIO = 10         # ...and this many times more frequent than the runner-up
+
+
+@dataclass
+class Segment:
+    """One transcribed subtitle line (times in seconds)."""
+    # Explicit __slots__ rather than dataclass(slots=True), which needs Python 3.10
+    __slots__ = ("start", "end", "text")
+    start: float
+    end: float
+    text: str
+
 
 def get_media_type(file_path: Path) -> str:
     """Determine if file is video, audio, or unsupported."""
@@ -58,44 +110,174 @@ def get_media_type(file_path: Path) -> str:
 # DEPENDENCY CHECK
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def check_dependencies():
-    """Verify all dependencies are installed."""
-    print("\n🔍 Checking dependencies...\n")
-    errors = []
-    warnings = []
+@functools.lru_cache(maxsize=1)
+def has_nvenc() -> bool:
+    """Check that ffmpeg can actually encode with NVENC (encoder built in and a GPU present)."""
+    cmd = [
+        "ffmpeg", "-hide_banner", "-f", "lavfi", "-i", "color=size=256x256:duration=0.1",
+        "-c:v", "h264_nvenc", "-f", "null", "-"
+    ]
+    try:
+        return subprocess.run(cmd, capture_output=True).returncode == 0
+    except FileNotFoundError:
+        return False
+
 
-    # 1. FFmpeg (required)
+@functools.lru_cache(maxsize=1)
+def has_async_protocol() -> bool:
+    """Check that ffmpeg was built with the "async" input protocol."""
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-protocols"], capture_output=True, text=True
+        )
+    except FileNotFoundError:
+        return False
+    return "async" in result.stdout.split()
+
+
+def ffmpeg_input(media_path: Path) -> str:
+    """ffmpeg -i argument: large files get a background read-ahead thread via async:."""
+    if media_path.stat().st_size >= ASYNC_READ_MIN_BYTES and has_async_protocol():
+        return f"async:file:{media_path}"
+    return str(media_path)
+
+
+def check_ffmpeg() -> tuple:
+    """FFmpeg (required). Returns (lines, error, warning)."""
     try:
         result = subprocess.run(["ffmpeg", "-version"], capture_output=True, text=True)
-        if result.returncode == 0:
-            print("  ✓ FFmpeg installed")
-        else:
-            errors.append("FFmpeg not found. Install with: brew install ffmpeg")
     except FileNotFoundError:
-        errors.append("FFmpeg not found. Install with: brew install ffmpeg")
+        result = None
+    if not result or result.returncode != 0:
+        return [], "FFmpeg not found. Install with: brew install ffmpeg", None
+
+    return ["  ✓ FFmpeg installed"], None, None
 
-    # 2. Whisper (required)
+
+def check_whisper() -> tuple:
+    """Whisper (required). Returns (lines, error, warning)."""
     try:
-        import whisper
-        print("  ✓ Whisper installed")
+        import faster_whisper
+        return ["  ✓ Whisper installed (faster-whisper)"], None, None
     except ImportError:
-        errors.append("Whisper not installed. Install with: pip install openai-whisper")
+        return [], "Whisper not installed. Install with: pip install faster-whisper", None
+
 
-    # 3. LanguageTool (optional)
+def check_symspell() -> tuple:
+    """SymSpell (optional, in-process English spell check). Returns (lines, error, warning)."""
+    try:
+        import symspellpy
+        return ["  ✓ SymSpell installed (fast English correction)"], None, None
+    except ImportError:
+        return [
+            "  ⚠ SymSpell not installed (fast English correction disabled)",
+            "    → To install: pip install symspellpy",
+        ], None, None
+
+
+def check_languagetool() -> tuple:
+    """LanguageTool (optional). Returns (lines, error, warning)."""
     try:
         import language_tool_python
-        lt_path = Path.home() / ".cache" / "language_tool_python"
-        if lt_path.exists() and any(lt_path.iterdir()):
-            print("  ✓ LanguageTool installed (grammar correction enabled)")
-        else:
-            print("  ⚠ LanguageTool: local server not downloaded yet")
-            print("    → Will download on first use (~255 MB)")
     except ImportError:
-        warnings.append(
-            "LanguageTool not installed (grammar correction disabled)\n"
+        return [], None, (
+            "LanguageTool not installed (grammar correction disabled, except English with SymSpell)\n"
             "    → To install: pip install language_tool_python"
         )
 
+    lt_path = Path.home() / ".cache" / "language_tool_python"
+    if lt_path.exists() and any(lt_path.iterdir()):
+        return ["  ✓ LanguageTool installed (grammar correction enabled)"], None, None
+    return [
+        "  ⚠ LanguageTool: local server not downloaded yet",
+        "    → Will download on first use (~255 MB)",
+    ], None, None
+
+
+def quantized_model_path() -> Path:
+    """Local INT8 CTranslate2 conversion of WHISPER_MODEL."""
+    return MODELS_DIR / f"whisper-{WHISPER_MODEL}-int8"
+
+
+def whisper_model_source() -> str:
+    """Use the local INT8 model when it is complete, otherwise the faster-whisper hub model."""
+    path = quantized_model_path()
+    return str(path) if (path / "model.bin").exists() else WHISPER_MODEL
+
+
+def convert_model(retry: bool = False) -> None:
+    """Convert the Hugging Face Whisper checkpoint to INT8 CTranslate2 weights under models/.
+
+    A failed conversion is not repeated on normal runs, only when retry is
+    set (--check).
+    """
+    path = quantized_model_path()
+    failed = path.with_name(path.name + ".failed")
+    if (path / "model.bin").exists():
+        print(f"  ✓ INT8 model ready ({path.relative_to(MODELS_DIR.parent)})")
+        return
+    hf_model = HF_MODEL_IDS.get(WHISPER_MODEL)
+    if hf_model is None:  # No known checkpoint for this name: keep the hub model
+        return
+    # ct2-transformers-converter always ships with ctranslate2, but only runs with these
+    if not all(importlib.util.find_spec(name) for name in ("transformers", "torch")):
+        print("  ⚠ INT8 model not converted: using the default faster-whisper model")
+        print("    → To enable: pip install transformers[torch] && python3 caption_video.py --check")
+        return
+    if failed.exists() and not retry:
+        print("  ⚠ INT8 conversion failed earlier: using the default faster-whisper model")
+        print("    → To retry: python3 caption_video.py --check")
+        return
+
+    print(f"  … Converting {hf_model} to INT8 (one-time, downloads the full checkpoint)...")
+    # Convert into a temp dir and rename when done, so an interrupted run leaves no half model
+    partial = path.with_name(path.name + ".partial")
+    shutil.rmtree(partial, ignore_errors=True)
+    shutil.rmtree(path, ignore_errors=True)
+    cmd = [
+        CT2_CONVERTER, "--model", hf_model,
+        "--output_dir", str(partial), "--quantization", "int8",
+        "--copy_files", "tokenizer.json", "preprocessor_config.json"
+    ]
+    try:
+        # Converter output (download progress, errors) goes straight to the terminal
+        subprocess.run(cmd, check=True)
+        partial.rename(path)
+        failed.unlink(missing_ok=True)
+        print(f"  ✓ INT8 model ready ({path.relative_to(MODELS_DIR.parent)})")
+    except (subprocess.CalledProcessError, FileNotFoundError):
+        MODELS_DIR.mkdir(exist_ok=True)
+        failed.touch()
+        print("  ⚠ INT8 conversion failed: using the default faster-whisper model")
+        print("    → To retry: python3 caption_video.py --check")
+    finally:
+        shutil.rmtree(partial, ignore_errors=True)
+
+
+def check_dependencies(retry_conversion: bool = False):
+    """Verify all dependencies are installed (retry_conversion: re-attempt a failed INT8 conversion)."""
+    print("\n🔍 Checking dependencies...\n")
+    errors = []
+    warnings = []
+
+    # Probes are independent (subprocess + heavy imports): run them concurrently,
+    # then report in a fixed order
+    checks = [check_ffmpeg, check_whisper, check_symspell, check_languagetool]
+    with ThreadPoolExecutor(max_workers=len(checks)) as executor:
+        results = list(executor.map(lambda check: check(), checks))
+
+    for lines, error, warning in results:
+        for line in lines:
+            print(line)
+        if error:
+            errors.append(error)
+        if warning:
+            warnings.append(warning)
+
+    # Pre-quantized model (optional, converted once; needs faster-whisper's ctranslate2)
+    if not errors:
+        convert_model(retry=retry_conversion)
+
     # Show errors
     if errors:
         print("\n❌ ERROR - Required dependencies missing:\n")
@@ -111,56 +293,246 @@ def check_dependencies():
             print(f"  ⚠ {warn}")
 
     print("\n" + "─" * 70 + "\n")
-    return len(warnings) == 0
+    # Grammar correction works with either backend (SymSpell covers English only)
+    return any(importlib.util.find_spec(name) for name in ("language_tool_python", "symspellpy"))
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # CORE FUNCTIONS
 # ═══════════════════════════════════════════════════════════════════════════════
 
-def extract_audio(video_path: Path, audio_path: Path) -> None:
-    """Extract audio from video."""
-    print("📢 Extracting audio from video...")
-    cmd = [
-        "ffmpeg", "-y", "-i", str(video_path),
-        "-vn", "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1",
-        str(audio_path)
-    ]
-    subprocess.run(cmd, check=True, capture_output=True)
-    print(f"   → {audio_path.name}")
+SAMPLE_RATE = 16000  # Whisper expects 16 kHz mono audio
 
 
-def convert_audio(input_path: Path, output_path: Path) -> None:
-    """Convert audio file to WAV 16kHz mono for Whisper."""
-    print("📢 Converting audio...")
+def load_audio(media_path: Path):
+    """Decode the audio track to a 16 kHz mono float32 array via an ffmpeg pipe."""
+    import numpy as np
+
+    if get_media_type(media_path) == "video":
+        print("📢 Extracting audio from video...")
+    else:
+        print("📢 Converting audio...")
+
     cmd = [
-        "ffmpeg", "-y", "-i", str(input_path),
-        "-acodec", "pcm_s16le", "-ar", "16000", "-ac", "1",
-        str(output_path)
+        "ffmpeg", "-nostdin", "-i", ffmpeg_input(media_path),
+        "-vn", "-f", "s16le", "-acodec", "pcm_s16le",
+        "-ar", str(SAMPLE_RATE), "-ac", "1", "-"
     ]
-    subprocess.run(cmd, check=True, capture_output=True)
-    print(f"   → {output_path.name}")
+    proc = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=FFMPEG_LOG)
+    audio = np.frombuffer(proc.stdout, np.int16).astype(np.float32) / 32768.0
+    print(f"   → {format_timestamp(len(audio) / SAMPLE_RATE)[:-4]} of audio")
+    return audio
+
+
+def get_device() -> tuple:
+    """Pick the CTranslate2 device, compute type and number of GPUs."""
+    import ctranslate2
+
+    n_gpu = ctranslate2.get_cuda_device_count()
+    if n_gpu > 0:
+        return "cuda", "int8_float16", n_gpu
+    return "cpu", "int8", 0
+
+
+def split_audio(audio, parts: int) -> list:
+    """Split audio into ~equal chunks cut in silence, as (offset_seconds, samples)."""
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    options = VadOptions(min_silence_duration_ms=SPLIT_MIN_SILENCE_MS)
+    window = 30 * SAMPLE_RATE
+    target = len(audio) / parts
+
+    # VAD only around each ideal cut point: the shards run their own VAD anyway
+    cuts = set()
+    for k in range(1, parts):
+        goal = int(k * target)
+        lo = max(goal - window, 0)
+        speech = get_speech_timestamps(audio[lo:goal + window], options)
+        gaps = [lo + (prev["end"] + nxt["start"]) // 2 for prev, nxt in zip(speech, speech[1:])]
+        cuts.add(min(gaps, key=lambda g: abs(g - goal)) if gaps else goal)
+
+    bounds = [0] + sorted(cuts) + [len(audio)]
+    return [(a / SAMPLE_RATE, audio[a:b]) for a, b in zip(bounds, bounds[1:]) if b > a]
+
+
+class CudaFeatureExtractor:
+    """Drop-in for faster-whisper's FeatureExtractor computing log-mel on the GPU."""
+
+    def __init__(self, base, torch):
+        self.base = base
+        self.torch = torch
+        self.window = torch.hann_window(base.n_fft, device="cuda")
+        self.filters = torch.from_numpy(base.mel_filters).float().to("cuda")
+
+    def __getattr__(self, name):
+        return getattr(self.base, name)
+
+    def __call__(self, waveform, padding=160, chunk_length=None):
+        torch = self.torch
+        if chunk_length is not None:
+            self.base.n_samples = chunk_length * self.base.sampling_rate
+            self.base.nb_max_frames = self.base.n_samples // self.base.hop_length
+
+        audio = torch.from_numpy(waveform).float().to("cuda")
+        if padding:
+            audio = torch.nn.functional.pad(audio, (0, padding))
+        stft = torch.stft(audio, self.base.n_fft, self.base.hop_length,
+                          window=self.window, return_complex=True)
+        magnitudes = stft[..., :-1].abs() ** 2
+        log_spec = torch.clamp(self.filters @ magnitudes, min=1e-10).log10()
+        log_spec = torch.maximum(log_spec, log_spec.max() - 8.0)
+        return ((log_spec + 4.0) / 4.0).cpu().numpy()
+
+
+def use_gpu_features(model) -> None:
+    """Move log-mel feature extraction to CUDA when PyTorch with CUDA is available."""
+    try:
+        import torch
+    except ImportError:
+        return
+    if torch.cuda.is_available():
+        model.feature_extractor = CudaFeatureExtractor(model.feature_extractor, torch)
 
 
-def transcribe_audio(audio_path: Path) -> dict:
-    """Transcribe audio using Whisper."""
-    import whisper
+@functools.lru_cache(maxsize=2)
+def get_model(model_name: str, device: str, compute_type: str, n_gpu: int):
+    """Load a Whisper model once and reuse it for every file in the run."""
+    from faster_whisper import WhisperModel
 
-    print(f"🎙️  Transcribing with Whisper ({WHISPER_MODEL})...")
-    print("   (this may take a few minutes)")
+    # device_index=[0..n-1] already loads one replica per GPU; num_workers is per device
+    model = WhisperModel(
+        model_name, device=device, compute_type=compute_type,
+        device_index=list(range(n_gpu)) or 0, num_workers=1
+    )
+    if device == "cuda":
+        use_gpu_features(model)
+    return model
 
-    model = whisper.load_model(WHISPER_MODEL)
-    result = model.transcribe(str(audio_path), language=None, verbose=False)
 
-    lang = result.get("language", "??")
-    segments = len(result["segments"])
-    print(f"   → Language: {lang} | Segments: {segments}")
+def transcribe_audio(audio) -> tuple:
+    """Transcribe audio using Whisper (faster-whisper / CTranslate2).
 
-    return result
+    Returns (language, segments) where segments is an iterator: decoding
+    happens as the caller consumes it.
+    """
+    from faster_whisper import BatchedInferencePipeline
 
+    print(f"🎙️  Transcribing with Whisper ({WHISPER_MODEL})...")
+    print("   (this may take a few minutes)")
+
+    device, compute_type, n_gpu = get_device()
+    model = get_model(whisper_model_source(), device, compute_type, n_gpu)
+
+    # One chunk per GPU: CTranslate2 runs concurrent calls on separate devices
+    chunks = split_audio(audio, n_gpu) if n_gpu > 1 else [(0.0, audio)]
+    if len(chunks) > 1:
+        print(f"   → Sharding across {len(chunks)} GPUs")
+
+    def run(chunk, language=None):
+        offset, samples = chunk
+        pipeline = BatchedInferencePipeline(model=model)
+        # Only VAD-detected speech is encoded (the batched default already cuts
+        # pauses from 160 ms); timestamps come back on the original timeline
+        segments_iter, info = pipeline.transcribe(
+            samples, language=language, beam_size=5,
+            batch_size=WHISPER_BATCH_SIZE, vad_filter=True
+        )
+        segments = (
+            Segment(s.start + offset, s.end + offset, s.text)
+            for s in segments_iter
+        )
+        return info.language, segments
+
+    if len(chunks) == 1:
+        lang, segments = run(chunks[0])
+    else:
+        # Language is detected once, on the first 30 s, so every shard decodes in the
+        # same language and none has to wait for another to start
+        lang, _, _ = model.detect_language(audio[:30 * SAMPLE_RATE])
+
+        # Shards decode concurrently; their segments are yielded back in timeline order
+        def decode(chunk):
+            return list(run(chunk, language=lang)[1])
+
+        executor = ThreadPoolExecutor(max_workers=len(chunks))
+        futures = [executor.submit(decode, chunk) for chunk in chunks]
+
+        def merged():
+            with executor:
+                for future in futures:
+                    yield from future.result()
+
+        segments = merged()
+
+    print(f"   → Language: {lang}")
+
+    return lang, segments
+
+
+@functools.lru_cache(maxsize=1)
+def get_sym_spell():
+    """Load the SymSpell English frequency dictionary once."""
+    from importlib.resources import files
+    from symspellpy import SymSpell
+
+    sym_spell = SymSpell(max_dictionary_edit_distance=2)
+    dictionary = files("symspellpy") / "frequency_dictionary_en_82_765.txt"
+    sym_spell.load_dictionary(str(dictionary), term_index=0, count_index=1)
+    return sym_spell
+
+
+def correct_spelling(segments, sym_spell):
+    """Fix English spelling in-process with SymSpell (no LanguageTool server).
+
+    Works segment by segment, so it returns a lazy iterator over the input
+    stream: corrected lines reach save_srt while Whisper is still decoding.
+    """
+    from symspellpy import Verbosity
+
+    print("✏️  Correcting spelling (SymSpell, en)...")
+
+    def fix_word(match):
+        # Deliberately narrow: Whisper rarely misspells, so jargon, slang and lowercase
+        # brands missing from the dictionary must survive. Only rewrite a word when the
+        # best suggestion is a common word and clearly ahead of any other candidate.
+        word = match.group()
+        # Two edits on a short word reach unrelated words: allow only one there
+        distance = 1 if len(word) <= 4 else 2
+        suggestions = sym_spell.lookup(word, Verbosity.CLOSEST, max_edit_distance=distance)
+        if not suggestions or suggestions[0].distance == 0:
+            return word
+        best = suggestions[0]
+        if best.count < SPELL_MIN_COUNT:
+            return word
+        if len(suggestions) > 1 and best.count < SPELL_MIN_RATIO * suggestions[1].count:
+            return word
+        return best.term
+
+    def corrected():
+        fixes = 0
+        for seg in segments:
+            original = seg.text.strip()
+            fixed = SPELL_WORD_RE.sub(fix_word, original)
+            if fixed != original:
+                fixes += 1
+            yield Segment(seg.start, seg.end, fixed)
+        print(f"   → {fixes} spelling corrections applied")
+
+    return corrected()
+
+
+def correct_grammar(segments, lang_code: str):
+    """Fix grammar errors using LanguageTool (SymSpell for English, if installed).
+
+    Accepts the transcribe_audio stream. SymSpell corrects it lazily; the
+    LanguageTool path collects every segment for its single batched request.
+    """
+    if lang_code == "en":
+        try:
+            return correct_spelling(segments, get_sym_spell())
+        except ImportError:
+            pass
 
-def correct_grammar(segments: list, lang_code: str) -> list:
-    """Fix grammar errors using LanguageTool."""
     try:
         import language_tool_python
     except ImportError:
@@ -175,15 +547,25 @@ def correct_grammar(segments: list, lang_code: str) -> list:
         print(f"   ⚠ LanguageTool unavailable: {e}")
         return segments
 
-    corrected = []
+    # One request for the whole video: collect the stream first
+    segments = list(segments)
+    originals = [seg.text.strip() for seg in segments]
+
+    # One LanguageTool request for the whole video instead of one per segment
+    fixed_parts = tool.correct(GRAMMAR_SEPARATOR.join(originals)).split(GRAMMAR_SEPARATOR)
+    if len(fixed_parts) != len(originals):
+        # Fallback: per-segment requests, overlapped since each one waits on the LT server
+        with ThreadPoolExecutor(max_workers=GRAMMAR_WORKERS) as executor:
+            fixed_parts = list(executor.map(tool.correct, originals))
+
+    corrected = [None] * len(segments)
     fixes = 0
 
-    for seg in segments:
-        original = seg["text"].strip()
-        fixed = tool.correct(original)
+    for i, (seg, original, fixed) in enumerate(zip(segments, originals, fixed_parts)):
+        fixed = fixed.strip()
         if fixed != original:
             fixes += 1
-        corrected.append({"start": seg["start"], "end": seg["end"], "text": fixed})
+        corrected[i] = Segment(seg.start, seg.end, fixed)
 
     tool.close()
     print(f"   → {fixes} corrections applied")
@@ -200,43 +582,111 @@ def format_timestamp(seconds: float) -> str:
     return f"{h:02d}:{m:02d}:{s:02d},{ms:03d}"
 
 
-def save_srt(segments: list, srt_path: Path) -> None:
-    """Save subtitles in SRT format."""
+def format_timestamps(seconds) -> list:
+    """Vectorized format_timestamp for a NumPy array of times."""
+    import numpy as np
+
+    total_ms = (seconds * 1000).astype(np.int64)
+    h, rem = np.divmod(total_ms, 3_600_000)
+    m, rem = np.divmod(rem, 60_000)
+    s, ms = np.divmod(rem, 1000)
+    return [
+        f"{h_:02d}:{m_:02d}:{s_:02d},{ms_:03d}"
+        for h_, m_, s_, ms_ in zip(h.tolist(), m.tolist(), s.tolist(), ms.tolist())
+    ]
+
+
+def format_srt(segments: list[Segment], first_index: int) -> str:
+    """Render a batch of segments as SRT entries, numbered from first_index."""
+    import numpy as np
+
+    count = len(segments)
+    starts = format_timestamps(np.fromiter((seg.start for seg in segments), float, count))
+    ends = format_timestamps(np.fromiter((seg.end for seg in segments), float, count))
+    return "".join([
+        f"{i}\n{start} --> {end}\n{seg.text.strip()}\n\n"
+        for i, seg, start, end in zip(range(first_index, first_index + count), segments, starts, ends)
+    ])
+
+
+def save_srt(segments, srt_path: Path) -> list[Segment]:
+    """Save subtitles in SRT format, writing batches as segments arrive.
+
+    Accepts any iterable (e.g. the transcribe_audio stream) and returns the
+    saved segments as a list.
+    """
     print("💾 Saving SRT subtitles...")
+    saved = []
+    stream = iter(segments)
     with open(srt_path, "w", encoding="utf-8") as f:
-        for i, seg in enumerate(segments, 1):
-            start = format_timestamp(seg["start"])
-            end = format_timestamp(seg["end"])
-            f.write(f"{i}\n{start} --> {end}\n{seg['text'].strip()}\n\n")
-    print(f"   → {srt_path.name}")
+        while batch := list(itertools.islice(stream, SRT_WRITE_BATCH)):
+            f.write(format_srt(batch, len(saved) + 1))
+            saved += batch
+    print(f"   → {srt_path.name} ({len(saved)} segments)")
+    return saved
 
 
-def save_transcript(segments: list, txt_path: Path) -> None:
+def save_transcript(segments: list[Segment], txt_path: Path) -> None:
     """Save full transcript as plain text."""
     print("💾 Saving transcript...")
-    text = " ".join(seg["text"].strip() for seg in segments)
-    with open(txt_path, "w", encoding="utf-8") as f:
-        f.write(text)
+    # Repeated lines ("Yes.", "Okay.") share one interned string; no intermediate list
+    buf = io.StringIO()
+    for i, seg in enumerate(segments):
+        if i:
+            buf.write(" ")
+        buf.write(sys.intern(seg.text.strip()))
+    txt_path.write_text(buf.getvalue(), encoding="utf-8")
     print(f"   → {txt_path.name}")
 
 
-def burn_subtitles(video_path: Path, srt_path: Path, output_path: Path) -> None:
-    """Burn subtitles into video (always visible)."""
-    print("🎬 Creating video with burned-in subtitles...")
-    print("   (this may take a few minutes)")
+def wait_ffmpeg(proc: subprocess.Popen, output_path: Path, fallback=None) -> None:
+    """Wait for a background ffmpeg encode started by burn/embed_subtitles.
 
-    srt_escaped = str(srt_path).replace(":", "\\:").replace("'", "\\'")
-    cmd = [
-        "ffmpeg", "-y", "-i", str(video_path),
-        "-vf", f"subtitles='{srt_escaped}'",
-        "-c:a", "copy", str(output_path)
-    ]
-    subprocess.run(cmd, check=True, capture_output=True)
+    If it fails and a fallback is given, the fallback is called to start a
+    replacement encode, which is waited on instead.
+    """
+    if proc.wait() != 0:
+        if fallback is None:
+            raise subprocess.CalledProcessError(proc.returncode, proc.args)
+        print("   ⚠ GPU encode failed, retrying with libx264...")
+        return wait_ffmpeg(fallback(), output_path)
     print(f"   → {output_path.name}")
 
 
-def embed_subtitles(video_path: Path, srt_path: Path, output_path: Path) -> None:
-    """Embed subtitles as a separate track (toggleable in player)."""
+def burn_subtitles(video_path: Path, srt_path: Path, output_path: Path,
+                   nvenc: bool = True) -> subprocess.Popen:
+    """Burn subtitles into video (always visible). Returns the running ffmpeg.
+
+    Uses NVENC when available unless nvenc is False (libx264 on the CPU).
+    """
+    if nvenc:
+        print("🎬 Creating video with burned-in subtitles...")
+        print("   (this may take a few minutes)")
+
+    srt_escaped = str(srt_path).translate(SUBTITLES_ESCAPE)
+    if nvenc and has_nvenc():
+        # Decode and encode on the GPU; the subtitles filter itself runs on the CPU.
+        # Constant-quality VBR (CQ 23) to match libx264's default CRF 23; 8-bit 4:2:0
+        # because h264_nvenc rejects the p010le ffmpeg picks for 10-bit sources
+        print("   (GPU encoding with NVENC)")
+        cmd = [
+            "ffmpeg", "-y", "-hwaccel", "cuda", "-i", str(video_path),
+            "-vf", f"subtitles='{srt_escaped}'",
+            "-c:v", "h264_nvenc", "-preset", "p4",
+            "-rc", "vbr", "-cq", "23", "-b:v", "0", "-pix_fmt", "yuv420p",
+            "-c:a", "copy", str(output_path)
+        ]
+    else:
+        cmd = [
+            "ffmpeg", "-y", "-i", str(video_path),
+            "-vf", f"subtitles='{srt_escaped}'",
+            "-c:a", "copy", str(output_path)
+        ]
+    return subprocess.Popen(cmd, stdout=FFMPEG_LOG, stderr=FFMPEG_LOG)
+
+
+def embed_subtitles(video_path: Path, srt_path: Path, output_path: Path) -> subprocess.Popen:
+    """Embed subtitles as a separate track (toggleable in player). Returns the running ffmpeg."""
     print("🎬 Creating video with soft subtitles...")
 
     cmd = [
@@ -245,22 +695,72 @@ def embed_subtitles(video_path: Path, srt_path: Path, output_path: Path) -> None
         "-c:v", "copy", "-c:a", "copy", "-c:s", "mov_text",
         str(output_path)
     ]
-    subprocess.run(cmd, check=True, capture_output=True)
-    print(f"   → {output_path.name}")
+    return subprocess.Popen(cmd, stdout=FFMPEG_LOG, stderr=FFMPEG_LOG)
 
 
 # ═══════════════════════════════════════════════════════════════════════════════
 # MAIN
 # ═══════════════════════════════════════════════════════════════════════════════
 
+def process_media(media_path: Path, media_type: str, output: Path,
+                  soft: bool, grammar: bool) -> list:
+    """Run the full pipeline on one file. Returns (path, kind) for each output."""
+    name = media_path.stem
+    is_video = media_type == "video"
+
+    print(f"📁 {media_type.capitalize()}: {media_path.name}\n")
+
+    if not is_video and soft:
+        print("⚠  Note: --soft option ignored for audio files\n")
+
+    print("─" * 70 + "\n")
+
+    # Output paths
+    srt_path = output / f"{name}.srt"
+    txt_path = output / f"{name}_transcript.txt"
+    suffix = "_soft" if soft else ""
+    video_out = output / f"{name}_captioned{suffix}.mp4"
+
+    # Pipeline
+    audio = load_audio(media_path)
+    lang, segments = transcribe_audio(audio)
+
+    if grammar:
+        segments = correct_grammar(segments, lang)
+
+    # Streamed (no correction or SymSpell): the SRT is written while Whisper is still decoding
+    segments = save_srt(segments, srt_path)
+
+    # ffmpeg only needs the SRT: write the transcript while it encodes
+    ffmpeg = None
+    fallback = None
+    if is_video:
+        if soft:
+            ffmpeg = embed_subtitles(media_path, srt_path, video_out)
+        else:
+            ffmpeg = burn_subtitles(media_path, srt_path, video_out)
+            if has_nvenc():
+                fallback = lambda: burn_subtitles(media_path, srt_path, video_out, nvenc=False)
+
+    save_transcript(segments, txt_path)
+
+    outputs = []
+    if ffmpeg:
+        wait_ffmpeg(ffmpeg, video_out, fallback)
+        outputs.append((video_out, "video"))
+    outputs.append((srt_path, "subtitles"))
+    outputs.append((txt_path, "transcript"))
+    return outputs
+
+
 def main():
     parser = argparse.ArgumentParser(
         description="Auto-generate subtitles for videos and transcriptions for audio",
         formatter_class=argparse.RawDescriptionHelpFormatter
     )
     parser.add_argument(
-        "media", nargs="?", type=Path,
-        help="Media file to process (video: mp4, mkv, mov, etc. | audio: mp3, wav, flac, etc.)"
+        "media", nargs="*", type=Path,
+        help="Media file(s) to process (video: mp4, mkv, mov, etc. | audio: mp3, wav, flac, etc.)"
     )
     parser.add_argument(
         "--soft", action="store_true",
@@ -280,88 +780,66 @@ def main():
     print(__doc__)
 
     # Check dependencies
-    has_grammar = check_dependencies()
+    has_grammar = check_dependencies(retry_conversion=args.check)
 
     if args.check:
         print("✅ Check complete.\n")
         sys.exit(0)
 
-    # Validate media file
+    # Validate media files
     if not args.media:
         print("❌ Error: please specify a media file\n")
         print("   Usage: python3 caption_video.py video.mp4")
         print("          python3 caption_video.py audio.mp3\n")
         sys.exit(1)
 
-    if not args.media.exists():
-        print(f"❌ Error: file not found: {args.media}\n")
-        sys.exit(1)
-
-    media_path = args.media.resolve()
-    media_type = get_media_type(media_path)
-
-    if media_type == "unknown":
-        print(f"❌ Error: unsupported file format: {media_path.suffix}\n")
-        print("   Supported video formats: " + ", ".join(sorted(VIDEO_EXTENSIONS)))
-        print("   Supported audio formats: " + ", ".join(sorted(AUDIO_EXTENSIONS)))
-        print()
-        sys.exit(1)
-
-    name = media_path.stem
-    is_video = media_type == "video"
+    jobs = []
+    stems = {}
+    for media in args.media:
+        if not media.exists():
+            print(f"❌ Error: file not found: {media}\n")
+            sys.exit(1)
+
+        media_path = media.resolve()
+        media_type = get_media_type(media_path)
+
+        if media_type == "unknown":
+            print(f"❌ Error: unsupported file format: {media_path.suffix}\n")
+            print("   Supported video formats: " + ", ".join(sorted(VIDEO_EXTENSIONS)))
+            print("   Supported audio formats: " + ", ".join(sorted(AUDIO_EXTENSIONS)))
+            print()
+            sys.exit(1)
+
+        # Output names come from the stem only: talk.mp4 and talk.mp3 would overwrite each other
+        stem = media_path.stem.lower()
+        if stem in stems:
+            print(f"❌ Error: {stems[stem].name} and {media_path.name} would write the same output files\n")
+            print("   Rename one of them or process them in separate runs\n")
+            sys.exit(1)
+        stems[stem] = media_path
+
+        jobs.append((media_path, media_type))
 
     # Output folder
     output = Path(__file__).parent / "output"
     output.mkdir(exist_ok=True)
 
-    print(f"📁 {media_type.capitalize()}: {media_path.name}\n")
-
-    if not is_video and args.soft:
-        print("⚠  Note: --soft option ignored for audio files\n")
-
-    print("─" * 70 + "\n")
-
-    # Output paths
-    audio_path = output / f"{name}_temp.wav"
-    srt_path = output / f"{name}.srt"
-    txt_path = output / f"{name}_transcript.txt"
-    suffix = "_soft" if args.soft else ""
-    video_out = output / f"{name}_captioned{suffix}.mp4"
-
-    # Pipeline
-    if is_video:
-        extract_audio(media_path, audio_path)
-    else:
-        convert_audio(media_path, audio_path)
-
-    result = transcribe_audio(audio_path)
-    segments = result["segments"]
-    lang = result.get("language", "en")
-
-    if has_grammar and not args.no_grammar:
-        segments = correct_grammar(segments, lang)
-
-    save_srt(segments, srt_path)
-    save_transcript(segments, txt_path)
-
-    if is_video:
-        if args.soft:
-            embed_subtitles(media_path, srt_path, video_out)
-        else:
-            burn_subtitles(media_path, srt_path, video_out)
-
-    # Cleanup
-    audio_path.unlink()
+    # Pipeline (the Whisper model is loaded once and reused across files)
+    outputs = []
+    for media_path, media_type in jobs:
+        outputs += process_media(
+            media_path, media_type, output,
+            soft=args.soft, grammar=has_grammar and not args.no_grammar
+        )
+        print()
 
     # Summary
-    print("\n" + "═" * 70)
+    print("═" * 70)
     print("✅ DONE!")
     print("═" * 70)
     print(f"\n📂 Output files:\n")
-    if is_video:
-        print(f"   • {video_out.name:<40} (video)")
-    print(f"   • {srt_path.name:<40} (subtitles)")
-    print(f"   • {txt_path.name:<40} (transcript)")
+    for path, kind in outputs:
+        print(f"   • {path.name:<40} ({kind})")
     print()
 
 